@@ -6,73 +6,807 @@ Provides integration with OpenAI models for supplementary analysis
 
 import os
 import sys
+import argparse
 import json
+import time
+import random
+import asyncio
+import sqlite3
+import hashlib
+import functools
+from pathlib import Path
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 
-# Load environment variables
+try:
+    import orjson
+except ImportError:  # Optional speed-up; the stdlib json module is used otherwise
+    orjson = None
+
+try:
+    import tiktoken
+except ImportError:  # Optional; token counts fall back to a ~4 chars/token estimate
+    tiktoken = None
+
+# Load environment variables once at import; library callers reuse the cached key
 load_dotenv()
+API_KEY = os.getenv('OPENAI_API_KEY')
+
+# Any OpenAI-compatible endpoint works, e.g. a local vLLM server at
+# http://localhost:8000/v1 for bulk workloads that benefit from batching
+OPENAI_API_BASE = os.getenv('OPENAI_BASE_URL', 'https://api.openai.com/v1').rstrip('/')
+
+# Phase -> model defaults, overridable via MODEL_MAP_JSON or .openai-models.json
+DEFAULT_MODEL_MAP = {
+    'research': 'gpt-4o',
+    'planning': 'o1-preview',
+    'testing': 'gpt-4o'
+}
+MODEL_MAP_PATH = Path(__file__).resolve().parent.parent / '.openai-models.json'
+
+# Terminal states reported by the Batch API that will never produce output
+BATCH_FAILED_STATES = {'failed', 'expired', 'cancelled'}
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# (connect, read) timeouts in seconds so a stalled connection cannot hang a phase.
+# The short read timeout suits Batch API control calls and streaming, where
+# bytes arrive steadily; a buffered chat completion sends nothing until the
+# whole reply is generated (o1 models reason first, packed replies are long).
+REQUEST_TIMEOUT = (5, 60)
+CHAT_COMPLETION_TIMEOUT = (5, 600)
+
+# Attempts per request and the cap on a single backoff sleep (seconds)
+MAX_ATTEMPTS = 6
+MAX_BACKOFF = 60
+
+# Shared session so repeated calls reuse keep-alive connections instead of
+# paying a new TCP + TLS handshake against api.openai.com every time.
+# Retries are handled by request_with_retry, not by the adapter.
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(pool_maxsize=32))
+_SESSION.mount('http://', HTTPAdapter(pool_maxsize=32))
+
+# Persistent prompt -> response cache shared across invocations
+CACHE_DB_PATH = Path(os.getenv(
+    'EXTERNAL_MODELS_CACHE',
+    Path(__file__).resolve().parent.parent / '.claude' / 'memory' / 'external-models-cache.db'
+))
+_CACHE_DB = None
+
+# Context window sizes (input + output tokens) used to right-size max_tokens
+MODEL_CONTEXT_WINDOWS = {
+    'gpt-4o': 128000,
+    'gpt-4o-mini': 128000,
+    'gpt-4-turbo': 128000,
+    'gpt-4': 8192,
+    'gpt-3.5-turbo': 16385,
+    'o1-preview': 128000,
+    'o1-mini': 128000
+}
+
+# Largest completion each model will generate in one reply (max_tokens cap)
+MODEL_MAX_OUTPUT_TOKENS = {
+    'gpt-4o': 16384,
+    'gpt-4o-mini': 16384,
+    'gpt-4-turbo': 4096,
+    'gpt-4': 8192,
+    'gpt-3.5-turbo': 4096,
+    'o1-preview': 32768,
+    'o1-mini': 65536
+}
+
+# Headroom for chat formatting tokens that are not part of the prompt text
+TOKEN_SLACK = 64
+
+# Never shrink the completion budget below this
+MIN_COMPLETION_TOKENS = 128
+
+# Instructions prepended when several prompts share one request. Sent as part
+# of the user message because reasoning models (o1-*) reject system messages.
+BATCH_INSTRUCTIONS = (
+    "You will receive a numbered list of independent inputs. Answer each one "
+    "separately and return ONLY a JSON array of strings, one entry per input, "
+    "in the same order as the inputs."
+)
+
+def json_dumps(obj):
+    """Serialize obj to UTF-8 encoded JSON bytes, using orjson when installed"""
+    if orjson:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+def json_loads(data):
+    """Parse JSON from bytes or str, using orjson when installed"""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+@functools.lru_cache(maxsize=None)
+def _token_encoding(model):
+    """tiktoken encoding for model, defaulting to o200k_base for unknown names"""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding('o200k_base')
+
+def count_tokens(model, text):
+    """Count tokens locally with tiktoken, or estimate them when it is not installed"""
+    if tiktoken:
+        return len(_token_encoding(model).encode(text))
+    return len(text) // 4
+
+def fit_max_tokens(model, prompt, max_tokens):
+    """Clamp max_tokens to the model's output cap and the context left after the prompt
 
-def call_openai_model(model, prompt, max_tokens=2000):
-    """Call OpenAI API with specified model"""
-    api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key:
+    Raises ValueError when the prompt alone does not fit the model's context.
+    """
+    max_tokens = min(max_tokens, MODEL_MAX_OUTPUT_TOKENS.get(model, max_tokens))
+    context = MODEL_CONTEXT_WINDOWS.get(model)
+    if context is None:
+        return max_tokens
+
+    input_tokens = count_tokens(model, prompt)
+    available = context - input_tokens - TOKEN_SLACK
+    if available < MIN_COMPLETION_TOKENS:
+        raise ValueError(f"prompt is {input_tokens} tokens, too long for {model}'s {context}-token context")
+    return min(max_tokens, available)
+
+def retry_delay(attempt, retry_after=None):
+    """Seconds to wait before the next attempt
+
+    Prefers the server's Retry-After header, otherwise exponential backoff
+    with jitter, capped at MAX_BACKOFF.
+    """
+    if retry_after:
+        try:
+            return min(float(retry_after), MAX_BACKOFF)
+        except ValueError:
+            pass  # HTTP-date form; fall back to backoff
+    return min(2 ** attempt + random.random(), MAX_BACKOFF)
+
+def request_with_retry(method, url, timeout=REQUEST_TIMEOUT, **kwargs):
+    """Send a request through the pooled session, retrying transient failures
+
+    429/5xx responses and connection errors are retried up to MAX_ATTEMPTS
+    times. The last response is returned as-is (callers raise_for_status);
+    the last connection error is re-raised.
+    """
+    for attempt in range(MAX_ATTEMPTS):
+        last_attempt = attempt == MAX_ATTEMPTS - 1
+        try:
+            response = _SESSION.request(method, url, timeout=timeout, **kwargs)
+        except requests.ConnectionError as e:
+            if last_attempt:
+                raise
+            delay = retry_delay(attempt)
+            print(f"Connection error ({e}), retrying in {delay:.1f}s...")
+        else:
+            if response.status_code not in RETRYABLE_STATUS or last_attempt:
+                return response
+            delay = retry_delay(attempt, response.headers.get('Retry-After'))
+            response.close()
+            print(f"OpenAI API returned {response.status_code}, retrying in {delay:.1f}s...")
+        time.sleep(delay)
+
+def build_batch_prompt(prompts):
+    """Pack several prompts into a single numbered user message"""
+    numbered = '\n\n'.join(f'{i}. {prompt}' for i, prompt in enumerate(prompts, 1))
+    return f'{BATCH_INSTRUCTIONS}\n\n{numbered}'
+
+def parse_batch_reply(content, expected):
+    """Extract the per-prompt answers from a batched JSON array reply"""
+    # Models occasionally wrap the array in prose or a ```json fence; decode
+    # from the first '[' and stop at the end of that array
+    start = content.find('[')
+    if start == -1:
+        raise ValueError("reply does not contain a JSON array")
+
+    answers, _ = json.JSONDecoder().raw_decode(content, start)
+    if not isinstance(answers, list) or len(answers) != expected:
+        raise ValueError(f"expected {expected} answers, got {len(answers) if isinstance(answers, list) else 'non-list'}")
+
+    return [a if isinstance(a, str) else json.dumps(a, indent=2) for a in answers]
+
+def prompts_per_call(model, max_tokens):
+    """How many prompts fit in one packed request without exceeding the output cap"""
+    output_cap = MODEL_MAX_OUTPUT_TOKENS.get(model)
+    if output_cap is None:
+        return None
+    return max(1, output_cap // max_tokens)
+
+def call_openai_model(model, prompts, max_tokens=2000):
+    """Call OpenAI API with specified model, packing prompts into as few requests as fit
+
+    Each prompt gets max_tokens of the reply, so prompts are split into chunks
+    that stay within the model's output cap. Returns a list of responses (one
+    per prompt, None for prompts whose chunk failed) or None if every chunk failed.
+    """
+    if isinstance(prompts, str):
+        prompts = [prompts]
+
+    chunk_size = prompts_per_call(model, max_tokens) or len(prompts)
+    if chunk_size >= len(prompts):
+        return _call_packed(model, prompts, max_tokens)
+
+    chunks = [prompts[i:i + chunk_size] for i in range(0, len(prompts), chunk_size)]
+    print(f"Splitting {len(prompts)} prompts into {len(chunks)} requests of up to {chunk_size}")
+    results = []
+    for chunk in chunks:
+        results.extend(_call_packed(model, chunk, max_tokens) or [None] * len(chunk))
+    if all(result is None for result in results):
+        return None
+    return results
+
+def _call_packed(model, prompts, max_tokens):
+    """Send prompts as one packed request; returns one response per prompt or None"""
+    if not API_KEY:
         print("Error: OPENAI_API_KEY not found in environment")
         return None
-    
+
     headers = {
-        'Authorization': f'Bearer {api_key}',
+        'Authorization': f'Bearer {API_KEY}',
         'Content-Type': 'application/json'
     }
-    
+
+    # A single prompt is sent verbatim; only batches need the JSON envelope.
+    # Every answer shares one reply, so the budget scales with the batch size.
+    content = prompts[0] if len(prompts) == 1 else build_batch_prompt(prompts)
+    try:
+        max_tokens = fit_max_tokens(model, content, max_tokens * len(prompts))
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+
     data = {
         'model': model,
-        'messages': [{'role': 'user', 'content': prompt}],
+        'messages': [{'role': 'user', 'content': content}],
         'max_tokens': max_tokens
     }
-    
+
     try:
-        response = requests.post(
-            'https://api.openai.com/v1/chat/completions',
+        response = request_with_retry(
+            'POST',
+            f'{OPENAI_API_BASE}/chat/completions',
             headers=headers,
-            json=data
+            data=json_dumps(data),
+            timeout=CHAT_COMPLETION_TIMEOUT
         )
         response.raise_for_status()
-        return response.json()['choices'][0]['message']['content']
+        choice = json_loads(response.content)['choices'][0]
+        reply = choice['message']['content']
+        truncated = choice.get('finish_reason') == 'length'
+        if len(prompts) == 1:
+            if truncated:
+                print(f"Warning: response truncated at max_tokens={max_tokens}")
+            return [reply]
+        if truncated:
+            raise ValueError(
+                f"batched reply for {len(prompts)} prompts truncated at max_tokens={max_tokens}; "
+                "send fewer prompts per call or use --parallel"
+            )
+        return parse_batch_reply(reply, len(prompts))
     except Exception as e:
         print(f"Error calling OpenAI API: {e}")
         return None
 
-def main():
-    if len(sys.argv) < 3:
-        print("Usage: python external-models.py <phase> <prompt>")
-        print("Phases: research, planning, testing")
+def stream_openai_model(model, prompt, max_tokens=2000):
+    """Call OpenAI API with streaming enabled, printing deltas as they arrive
+
+    Returns the full response text or None on failure.
+    """
+    if not API_KEY:
+        print("Error: OPENAI_API_KEY not found in environment")
+        return None
+
+    headers = {
+        'Authorization': f'Bearer {API_KEY}',
+        'Content-Type': 'application/json'
+    }
+
+    try:
+        max_tokens = fit_max_tokens(model, prompt, max_tokens)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+
+    data = {
+        'model': model,
+        'messages': [{'role': 'user', 'content': prompt}],
+        'max_tokens': max_tokens,
+        'stream': True
+    }
+
+    parts = []
+    try:
+        with request_with_retry(
+            'POST',
+            f'{OPENAI_API_BASE}/chat/completions',
+            headers=headers,
+            data=json_dumps(data),
+            stream=True
+        ) as response:
+            response.raise_for_status()
+            # Server-sent events: "data: {...}" lines, terminated by "data: [DONE]"
+            for line in response.iter_lines():
+                if not line.startswith(b'data: '):
+                    continue
+                payload = line[len(b'data: '):]
+                if payload == b'[DONE]':
+                    break
+                chunk = json_loads(payload)
+                if not chunk.get('choices'):
+                    continue
+                delta = chunk['choices'][0].get('delta', {}).get('content')
+                if delta:
+                    print(delta, end="", flush=True)
+                    parts.append(delta)
+        return ''.join(parts)
+    except Exception as e:
+        if parts:
+            print()
+        print(f"Error calling OpenAI API: {e}")
+        return None
+
+def call_openai_model_single(model, prompt, max_tokens=2000):
+    """Call OpenAI API with a single prompt and return its response text"""
+    results = call_openai_model(model, [prompt], max_tokens)
+    return results[0] if results else None
+
+def call_openai_batch(model, prompts, max_tokens=2000, poll_interval=30):
+    """Run prompts through the OpenAI Batch API (half price, completes within 24h)
+
+    Uploads one /v1/chat/completions request per prompt, polls the batch until
+    it finishes and returns a list of responses in prompt order. Individual
+    requests that failed are returned as None; returns None if the batch fails.
+    """
+    if not API_KEY:
+        print("Error: OPENAI_API_KEY not found in environment")
+        return None
+
+    headers = {'Authorization': f'Bearer {API_KEY}'}
+
+    lines = []
+    for i, prompt in enumerate(prompts):
+        try:
+            prompt_max_tokens = fit_max_tokens(model, prompt, max_tokens)
+        except ValueError as e:
+            print(f"Error in prompt {i + 1}: {e}")
+            return None
+        lines.append(json_dumps({
+            'custom_id': str(i),
+            'method': 'POST',
+            'url': '/v1/chat/completions',
+            'body': {
+                'model': model,
+                'messages': [{'role': 'user', 'content': prompt}],
+                'max_tokens': prompt_max_tokens
+            }
+        }))
+    batch_input = b'\n'.join(lines) + b'\n'
+
+    try:
+        # 1. Upload the request file
+        response = request_with_retry(
+            'POST',
+            f'{OPENAI_API_BASE}/files',
+            headers=headers,
+            data={'purpose': 'batch'},
+            files={'file': ('batch-input.jsonl', batch_input, 'application/jsonl')}
+        )
+        response.raise_for_status()
+        input_file_id = json_loads(response.content)['id']
+
+        # 2. Create the batch
+        response = request_with_retry(
+            'POST',
+            f'{OPENAI_API_BASE}/batches',
+            headers={**headers, 'Content-Type': 'application/json'},
+            data=json_dumps({
+                'input_file_id': input_file_id,
+                'endpoint': '/v1/chat/completions',
+                'completion_window': '24h'
+            })
+        )
+        response.raise_for_status()
+        batch = json_loads(response.content)
+        print(f"Submitted batch {batch['id']} ({len(prompts)} request(s)), polling every {poll_interval}s...")
+
+        # 3. Poll until the batch reaches a terminal state
+        while batch['status'] != 'completed':
+            if batch['status'] in BATCH_FAILED_STATES:
+                print(f"Error: batch {batch['id']} {batch['status']}: {batch.get('errors')}")
+                return None
+            time.sleep(poll_interval)
+            response = request_with_retry(
+                'GET',
+                f"{OPENAI_API_BASE}/batches/{batch['id']}",
+                headers=headers
+            )
+            response.raise_for_status()
+            batch = json_loads(response.content)
+
+        # 4. Download the results; output lines are not guaranteed to be in order
+        results = [None] * len(prompts)
+        if not batch.get('output_file_id'):
+            print(f"Error: batch {batch['id']} completed without output (see error_file_id)")
+            return results
+
+        response = request_with_retry(
+            'GET',
+            f"{OPENAI_API_BASE}/files/{batch['output_file_id']}/content",
+            headers=headers
+        )
+        response.raise_for_status()
+        for line in response.content.splitlines():
+            if not line.strip():
+                continue
+            entry = json_loads(line)
+            body = (entry.get('response') or {}).get('body') or {}
+            if entry.get('error') or 'choices' not in body:
+                print(f"Error in batch request {entry['custom_id']}: {entry.get('error') or body.get('error')}")
+                continue
+            results[int(entry['custom_id'])] = body['choices'][0]['message']['content']
+        return results
+    except Exception as e:
+        print(f"Error calling OpenAI Batch API: {e}")
+        return None
+
+class RateLimiter:
+    """Token-bucket limiter enforcing requests/min and tokens/min budgets"""
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.available_requests = requests_per_minute
+        self.available_tokens = tokens_per_minute
+        self.last_update = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self.last_update
+        self.last_update = now
+        self.available_requests = min(
+            self.requests_per_minute,
+            self.available_requests + self.requests_per_minute * elapsed / 60
+        )
+        self.available_tokens = min(
+            self.tokens_per_minute,
+            self.available_tokens + self.tokens_per_minute * elapsed / 60
+        )
+
+    async def acquire(self, tokens):
+        """Wait until one request and the given number of tokens are available"""
+        # A single request larger than the whole bucket would otherwise wait forever
+        tokens = min(tokens, self.tokens_per_minute)
+        async with self.lock:
+            while True:
+                self._refill()
+                if self.available_requests >= 1 and self.available_tokens >= tokens:
+                    self.available_requests -= 1
+                    self.available_tokens -= tokens
+                    return
+                wait = max(
+                    (1 - self.available_requests) * 60 / self.requests_per_minute,
+                    (tokens - self.available_tokens) * 60 / self.tokens_per_minute
+                )
+                await asyncio.sleep(max(wait, 0.01))
+
+def estimate_tokens(model, prompt, max_tokens):
+    """Token cost of a request for rate limiting (prompt tokens plus completion budget)"""
+    return count_tokens(model, prompt) + max_tokens
+
+async def call_openai_model_async(session, model, prompt, max_tokens=2000,
+                                  semaphore=None, limiter=None, max_attempts=MAX_ATTEMPTS):
+    """Call OpenAI API asynchronously through a shared aiohttp session
+
+    Retries 429/5xx responses with jittered exponential backoff, honouring Retry-After.
+    Returns the response text or None on failure.
+    """
+    if not API_KEY:
+        print("Error: OPENAI_API_KEY not found in environment")
+        return None
+
+    headers = {
+        'Authorization': f'Bearer {API_KEY}',
+        'Content-Type': 'application/json'
+    }
+
+    try:
+        max_tokens = fit_max_tokens(model, prompt, max_tokens)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+
+    data = {
+        'model': model,
+        'messages': [{'role': 'user', 'content': prompt}],
+        'max_tokens': max_tokens
+    }
+
+    cost = estimate_tokens(model, prompt, max_tokens)
+    semaphore = semaphore or asyncio.Semaphore(1)
+    for attempt in range(max_attempts):
+        if limiter:
+            await limiter.acquire(cost)
+        try:
+            async with semaphore:
+                async with session.post(f'{OPENAI_API_BASE}/chat/completions',
+                                        headers=headers, data=json_dumps(data)) as response:
+                    if response.status in RETRYABLE_STATUS and attempt < max_attempts - 1:
+                        delay = retry_delay(attempt, response.headers.get('Retry-After'))
+                    else:
+                        response.raise_for_status()
+                        body = json_loads(await response.read())
+                        return body['choices'][0]['message']['content']
+        except Exception as e:
+            print(f"Error calling OpenAI API: {e}")
+            return None
+
+        print(f"OpenAI API returned {response.status}, retrying in {delay:.1f}s...")
+        await asyncio.sleep(delay)
+
+    return None
+
+async def call_many(tasks, max_tokens=2000, max_concurrency=8,
+                    requests_per_minute=500, tokens_per_minute=30000):
+    """Run (model, prompt) tasks concurrently with bounded concurrency and throttling
+
+    Returns the responses in task order; failed tasks yield None.
+    Entry point: asyncio.run(call_many([(model, prompt), ...]))
+    """
+    try:
+        import aiohttp
+    except ImportError:
+        print("Error: aiohttp is required for parallel calls (pip install aiohttp)")
+        return [None] * len(tasks)
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+    limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+    timeout = aiohttp.ClientTimeout(
+        sock_connect=CHAT_COMPLETION_TIMEOUT[0],
+        sock_read=CHAT_COMPLETION_TIMEOUT[1]
+    )
+
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        return await asyncio.gather(*(
+            call_openai_model_async(session, model, prompt, max_tokens,
+                                    semaphore=semaphore, limiter=limiter)
+            for model, prompt in tasks
+        ))
+
+class CacheMiss(Exception):
+    """Raised by cache lookups so that misses are never memoised by lru_cache"""
+
+def cache_key(model, prompt, max_tokens):
+    """Stable cache key for a single endpoint/model/prompt/max_tokens request"""
+    # The endpoint is part of the key so a local server's "gpt-4o" never
+    # answers for the real one
+    return hashlib.sha256(f"{OPENAI_API_BASE}|{model}|{max_tokens}|{prompt}".encode('utf-8')).hexdigest()
+
+def _get_cache_db():
+    """Open (and create on first use) the SQLite response cache"""
+    global _CACHE_DB
+    if _CACHE_DB is None:
+        CACHE_DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _CACHE_DB = sqlite3.connect(CACHE_DB_PATH)
+        _CACHE_DB.execute(
+            'CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, response TEXT NOT NULL, ts REAL NOT NULL)'
+        )
+    return _CACHE_DB
+
+@functools.lru_cache(maxsize=512)
+def cache_get(key):
+    """Return the cached response for key, raising CacheMiss when absent"""
+    row = _get_cache_db().execute('SELECT response FROM cache WHERE key = ?', (key,)).fetchone()
+    if row is None:
+        raise CacheMiss(key)
+    return row[0]
+
+def cache_put(key, response):
+    """Store a response in the persistent cache"""
+    db = _get_cache_db()
+    db.execute(
+        'INSERT OR REPLACE INTO cache (key, response, ts) VALUES (?, ?, ?)',
+        (key, response, time.time())
+    )
+    db.commit()
+
+def with_cache(model, prompts, fetch, max_tokens=2000):
+    """Serve prompts from the cache and only send the misses to fetch()
+
+    fetch(missing_prompts) must return a list of responses in the same order
+    (entries may be None) or None on failure. Returns the merged results.
+    """
+    results = [None] * len(prompts)
+    keys = [cache_key(model, prompt, max_tokens) for prompt in prompts]
+    missing = []
+    try:
+        for i, key in enumerate(keys):
+            try:
+                results[i] = cache_get(key)
+            except CacheMiss:
+                missing.append(i)
+    except (sqlite3.Error, OSError) as e:
+        # The cache is best-effort: an unwritable path or broken database
+        # must not stop the API call
+        print(f"Warning: response cache unavailable ({e}), skipping it")
+        return fetch(prompts)
+
+    if len(missing) < len(prompts):
+        print(f"Cache: {len(prompts) - len(missing)}/{len(prompts)} response(s) reused")
+    if not missing:
+        return results
+
+    fresh = fetch([prompts[i] for i in missing])
+    if fresh is None:
+        return None
+
+    cache_writable = True
+    for i, response in zip(missing, fresh):
+        results[i] = response
+        if response is not None and cache_writable:
+            try:
+                cache_put(keys[i], response)
+            except (sqlite3.Error, OSError) as e:
+                print(f"Warning: could not write response cache: {e}")
+                cache_writable = False
+    return results
+
+def load_model_map():
+    """Phase -> model mapping with overrides from MODEL_MAP_JSON or .openai-models.json
+
+    Overrides are merged over DEFAULT_MODEL_MAP; the environment variable wins
+    over the file. Raises ValueError for malformed overrides.
+    """
+    source = 'MODEL_MAP_JSON'
+    raw = os.getenv('MODEL_MAP_JSON')
+    if raw is None and MODEL_MAP_PATH.is_file():
+        source = str(MODEL_MAP_PATH)
+        raw = MODEL_MAP_PATH.read_text(encoding='utf-8')
+
+    model_map = dict(DEFAULT_MODEL_MAP)
+    if raw is None:
+        return model_map
+
+    try:
+        overrides = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"{source}: invalid JSON ({e})")
+    if not isinstance(overrides, dict) or not all(
+            isinstance(k, str) and isinstance(v, str) for k, v in overrides.items()):
+        raise ValueError(f"{source}: expected an object mapping phase names to model names")
+
+    model_map.update(overrides)
+    return model_map
+
+def load_prompts(path):
+    """Load prompts from a JSONL file (one JSON string or {"prompt": ...} per line)"""
+    prompts = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            if isinstance(entry, dict):
+                entry = entry.get('prompt')
+            if not isinstance(entry, str):
+                raise ValueError(f"{path}:{line_no}: expected a string or an object with a 'prompt' key")
+            prompts.append(entry)
+    return prompts
+
+def build_parser(phases):
+    """Command-line interface for the phase, prompt source and call mode"""
+    parser = argparse.ArgumentParser(
+        description="Call an OpenAI model for supplementary phase analysis"
+    )
+    parser.add_argument('phase', choices=phases, help="workflow phase, selects the model")
+    parser.add_argument('prompt', nargs='?', help="prompt text (omit when using --prompts-file)")
+    parser.add_argument('--prompts-file', metavar='PATH',
+                        help="JSONL file with one JSON string or {\"prompt\": ...} per line")
+
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--stream', action='store_true',
+                      help="print the response as it is generated (single prompt only)")
+    mode.add_argument('--batch', action='store_true',
+                      help="use the OpenAI Batch API (50%% cheaper, results within 24h)")
+    mode.add_argument('--parallel', action='store_true',
+                      help="send each prompt as its own concurrent request (requires aiohttp)")
+
+    parser.add_argument('--no-cache', action='store_true',
+                        help="always call the API instead of reusing cached responses")
+    return parser
+
+def exit_without_api_key():
+    """Stop the CLI before an API call when no key is configured
+
+    Checked only once a prompt misses the cache, so cached runs need no key.
+    """
+    if not API_KEY:
+        print("Error: OPENAI_API_KEY not found in environment")
         sys.exit(1)
-    
-    phase = sys.argv[1]
-    prompt = sys.argv[2]
-    
+
+def main():
     # Model mapping based on phase
-    model_map = {
-        'research': 'gpt-4o',
-        'planning': 'o1-preview',
-        'testing': 'gpt-4o'
-    }
-    
-    if phase not in model_map:
-        print(f"Error: Unknown phase '{phase}'. Available: {list(model_map.keys())}")
+    try:
+        model_map = load_model_map()
+    except (OSError, ValueError) as e:
+        print(f"Error loading model map: {e}")
         sys.exit(1)
-    
-    model = model_map[phase]
-    print(f"Calling {model} for {phase} phase...")
-    
-    result = call_openai_model(model, prompt)
-    if result:
-        print(f"\n=== {model.upper()} Response ===")
-        print(result)
+
+    parser = build_parser(list(model_map))
+    # Intermixed so flags may sit between the phase and the prompt
+    args = parser.parse_intermixed_args()
+
+    if (args.prompt is None) == (args.prompts_file is None):
+        parser.error("provide exactly one of a prompt or --prompts-file")
+
+    if args.prompts_file:
+        try:
+            prompts = load_prompts(args.prompts_file)
+        except (OSError, ValueError) as e:
+            print(f"Error reading prompts file: {e}")
+            sys.exit(1)
+        if not prompts:
+            print("Error: prompts file is empty")
+            sys.exit(1)
     else:
+        prompts = [args.prompt]
+
+    if args.stream and len(prompts) > 1:
+        parser.error("--stream only supports a single prompt")
+
+    model = model_map[args.phase]
+    if args.batch:
+        mode = "Batch API"
+    elif args.parallel:
+        mode = f"{len(prompts)} parallel request(s)"
+    else:
+        mode = f"{len(prompts)} prompt(s)"
+    print(f"Calling {model} for {args.phase} phase ({mode})...")
+
+    if args.stream:
+        streamed = []
+
+        def fetch(missing):
+            exit_without_api_key()
+            print(f"\n=== {model.upper()} Response ===")
+            response = stream_openai_model(model, missing[0])
+            streamed.append(response)
+            return None if response is None else [response]
+
+        results = fetch(prompts) if args.no_cache else with_cache(model, prompts, fetch)
+        if not results:
+            print("Failed to get response from external model")
+            sys.exit(1)
+        if not streamed:
+            # Served from the cache, so nothing was printed while streaming
+            print(f"\n=== {model.upper()} Response ===")
+            print(results[0], end="")
+        print()
+        return
+
+    def fetch(missing):
+        exit_without_api_key()
+        if args.batch:
+            return call_openai_batch(model, missing)
+        if args.parallel:
+            return asyncio.run(call_many([(model, prompt) for prompt in missing]))
+        return call_openai_model(model, missing)
+
+    results = fetch(prompts) if args.no_cache else with_cache(model, prompts, fetch)
+    if not results or all(result is None for result in results):
         print("Failed to get response from external model")
         sys.exit(1)
 
+    for i, result in enumerate(results, 1):
+        suffix = f" [{i}/{len(results)}]" if len(results) > 1 else ""
+        print(f"\n=== {model.upper()} Response{suffix} ===")
+        print(result if result is not None else "(no response)")
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
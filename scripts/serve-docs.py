@@ -4,23 +4,182 @@ serve-docs.py - Local documentation server
 Serves documentation on http://localhost:8000
 """
 
+import argparse
+import datetime
+import email.utils
+import http
 import http.server
-import socketserver
+import gzip
+import html
+import io
 import os
+import sys
+import threading
 import webbrowser
+from functools import lru_cache, partial
 from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit
 
-def serve_docs(port=8000):
+try:
+    from markdown_it import MarkdownIt
+except ImportError:  # Optional; without it only the raw .md files are served
+    MarkdownIt = None
+
+# Documentation is served from the project root
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Text assets worth compressing before sending
+COMPRESSIBLE_EXTENSIONS = {'.html', '.md', '.css', '.js'}
+
+# Larger files (screenshots, archives) are streamed from disk instead of cached
+MAX_CACHED_FILE_SIZE = 1 << 20
+
+MARKDOWN_PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+</head>
+<body>
+{body}</body>
+</html>
+"""
+
+_markdown = None
+
+@lru_cache(maxsize=256)
+def _load(path, mtime_ns):
+    """Read a file into memory; mtime_ns in the key invalidates entries on edit"""
+    with open(path, 'rb') as f:
+        return f.read()
+
+def _html_link(href):
+    """Point a link at a local .md file to the page rendered from it"""
+    parts = urlsplit(href)
+    if parts.scheme or parts.netloc or not parts.path.lower().endswith('.md'):
+        return href
+    return urlunsplit(parts._replace(path=parts.path[:-len('.md')] + '.html'))
+
+@lru_cache(maxsize=256)
+def _render_markdown(path, mtime_ns):
+    """Render a markdown file to a standalone HTML page, cached until it changes"""
+    global _markdown
+    if _markdown is None:
+        _markdown = MarkdownIt('commonmark', {'html': True}).enable('table')
+    tokens = _markdown.parse(_load(path, mtime_ns).decode('utf-8'))
+    # Keep navigation inside the rendered site: links to other docs'
+    # .md files point at their .html pages instead of raw markdown
+    for token in tokens:
+        for child in token.children or ():
+            if child.type == 'link_open':
+                child.attrSet('href', _html_link(child.attrGet('href')))
+    body = _markdown.renderer.render(tokens, _markdown.options, {})
+    page = MARKDOWN_PAGE_TEMPLATE.format(title=html.escape(os.path.basename(path)), body=body)
+    return page.encode('utf-8')
+
+@lru_cache(maxsize=256)
+def _load_compressed(loader, path, mtime_ns):
+    """Gzip-compressed output of loader(path, mtime_ns), cached alongside it"""
+    return gzip.compress(loader(path, mtime_ns), compresslevel=6)
+
+def _markdown_source(path):
+    """Markdown file to render for a requested .html path that does not exist on disk"""
+    if MarkdownIt is None or not path.endswith('.html') or os.path.exists(path):
+        return None
+    source = path[:-len('.html')] + '.md'
+    return source if os.path.isfile(source) else None
+
+class DocsRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """Static file handler speaking HTTP/1.1 so browsers keep connections alive"""
+    protocol_version = 'HTTP/1.1'
+
+    def not_modified(self, mtime):
+        """Whether If-Modified-Since shows the client's copy is current
+
+        Mirrors the revalidation check in SimpleHTTPRequestHandler.send_head.
+        """
+        if "If-Modified-Since" not in self.headers or "If-None-Match" in self.headers:
+            return False
+        try:
+            ims = email.utils.parsedate_to_datetime(self.headers["If-Modified-Since"])
+        except (TypeError, IndexError, OverflowError, ValueError):
+            return False
+        if ims.tzinfo is None:
+            ims = ims.replace(tzinfo=datetime.timezone.utc)
+        if ims.tzinfo is not datetime.timezone.utc:
+            return False
+        last_modified = datetime.datetime.fromtimestamp(mtime, datetime.timezone.utc)
+        return last_modified.replace(microsecond=0) <= ims
+
+    def send_head(self):
+        """Serve small files and rendered markdown from memory, gzipped when accepted"""
+        path = self.translate_path(self.path)
+        markdown_source = _markdown_source(path)
+        if markdown_source:
+            # README.html etc. are rendered from README.md on first request
+            source, loader, content_type = markdown_source, _render_markdown, "text/html; charset=utf-8"
+        elif os.path.isfile(path):
+            source, loader, content_type = path, _load, self.guess_type(path)
+        else:
+            # Directory listings, redirects and 404s keep the default handling
+            return super().send_head()
+
+        try:
+            st = os.stat(source)
+        except OSError:
+            return super().send_head()
+        if loader is _load and st.st_size > MAX_CACHED_FILE_SIZE:
+            return super().send_head()
+        compressible = os.path.splitext(path)[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+        # Revalidate every cached file type before reading, rendering or
+        # compressing anything, so a 304 never touches the disk or the caches
+        if self.not_modified(st.st_mtime):
+            self.send_response(http.HTTPStatus.NOT_MODIFIED)
+            if compressible:
+                self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return None
+
+        try:
+            use_gzip = compressible and 'gzip' in self.headers.get('Accept-Encoding', '')
+            if use_gzip:
+                body = _load_compressed(loader, source, st.st_mtime_ns)
+            else:
+                body = loader(source, st.st_mtime_ns)
+        except (OSError, UnicodeDecodeError):
+            return super().send_head()
+
+        self.send_response(200)
+        self.send_header("Content-type", content_type)
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        if compressible:
+            self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Last-Modified", self.date_time_string(st.st_mtime))
+        self.end_headers()
+        return io.BytesIO(body)
+
+class DocsServer(http.server.ThreadingHTTPServer):
+    """Threaded server that can rebind immediately after a restart"""
+    allow_reuse_address = True
+
+def can_open_browser():
+    """Whether this host can plausibly show a browser window"""
+    if os.environ.get('CI'):
+        return False
+    if sys.platform in ('win32', 'darwin') or os.environ.get('BROWSER'):
+        return True
+    return bool(os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+
+def serve_docs(port=8000, open_browser=True, host="127.0.0.1", root=PROJECT_ROOT):
     """Serve documentation locally"""
-    # Change to project root directory
-    project_root = Path(__file__).parent.parent
-    os.chdir(project_root)
-    
-    # Create simple HTTP server
-    handler = http.server.SimpleHTTPRequestHandler
+    # Serve from root without changing the process working directory
+    handler = partial(DocsRequestHandler, directory=str(root))
     
     try:
-        with socketserver.TCPServer(("", port), handler) as httpd:
+        with DocsServer((host, port), handler) as httpd:
             print(f"📚 Serving documentation at http://localhost:{port}")
             print("📖 Available documentation:")
             print(f"   • Main: http://localhost:{port}/README.html")  
@@ -28,14 +187,28 @@ def serve_docs(port=8000):
             print(f"   • Workflow: http://localhost:{port}/WORKFLOW.html")
             print(f"   • Templates: http://localhost:{port}/TEMPLATE-GUIDE.html")
             print(f"   • Commands: http://localhost:{port}/.claude/commands/")
+            if MarkdownIt is None:
+                print("\n⚠️  markdown-it-py not installed; .html pages for markdown docs are unavailable")
+                print("   Install with: pip install markdown-it-py")
             print("\n🔄 Press Ctrl+C to stop server")
             
-            # Open browser automatically
-            webbrowser.open(f"http://localhost:{port}/README.html")
+            # Open browser automatically without delaying serve_forever
+            if open_browser and can_open_browser():
+                threading.Thread(
+                    target=webbrowser.open,
+                    args=(f"http://localhost:{port}/README.html",),
+                    daemon=True
+                ).start()
             
             httpd.serve_forever()
     except KeyboardInterrupt:
         print("\n✅ Documentation server stopped")
 
 if __name__ == "__main__":
-    serve_docs()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Serve project documentation locally")
+    parser.add_argument('--port', type=int, default=8000, help="port to listen on (default: 8000)")
+    parser.add_argument('--host', default="127.0.0.1",
+                        help="address to bind (default: 127.0.0.1; use 0.0.0.0 for LAN access)")
+    parser.add_argument('--no-browser', action='store_true', help="do not open a browser window")
+    args = parser.parse_args()
+    serve_docs(port=args.port, open_browser=not args.no_browser, host=args.host)
\ No newline at end of file